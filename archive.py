@@ -0,0 +1,194 @@
+import argparse
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from multiprocessing import Pool
+
+import pandas as pd
+import zstandard as zstd
+from requests.utils import get_encoding_from_headers
+
+from docfetch import DocumentFetcher
+
+FILED_DATE_FORMATS = ['%Y-%m-%d', '%m/%d/%Y', '%m-%d-%Y']
+
+
+# OSCN shows MM/DD/YYYY on case pages and takes MM-DD-YYYY in result URLs; the index keeps ISO dates.
+def normalize_filed_date(value):
+    for date_format in FILED_DATE_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), date_format).date().isoformat()
+        except (AttributeError, ValueError):
+            continue
+    return None
+
+
+# Each record is a WARC-style header block plus the raw payload, compressed as its own
+# zstd frame and appended to a per-day segment file. The sqlite index keeps the offset
+# and length of every frame so a single record can be read back without scanning.
+class ResponseArchive:
+    def __init__(self, root='archive', level=10):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+        self.compressor = zstd.ZstdCompressor(level=level)
+        self.decompressor = zstd.ZstdDecompressor()
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(self.root, 'index.sqlite3'), check_same_thread=False)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS records (
+                url TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                date TEXT NOT NULL,
+                fetched_at TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                content_type TEXT,
+                segment TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                filed_date TEXT
+            )""")
+        columns = [row[1] for row in self.db.execute("PRAGMA table_info(records)")]
+        if 'filed_date' not in columns:
+            self.db.execute("ALTER TABLE records ADD COLUMN filed_date TEXT")
+        self.db.execute("CREATE INDEX IF NOT EXISTS records_url ON records (url)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS records_kind_date ON records (kind, date)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS records_kind_filed_date ON records (kind, filed_date)")
+        self.db.commit()
+
+    def store(self, url, response, kind, filed_date=None):
+        fetched_at = datetime.now(timezone.utc)
+        content_type = response.headers.get('Content-Type', '')
+        header = (
+            "WARC/1.0\r\n"
+            "WARC-Type: response\r\n"
+            f"WARC-Target-URI: {url}\r\n"
+            f"WARC-Date: {fetched_at.strftime('%Y-%m-%dT%H:%M:%SZ')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(response.content)}\r\n\r\n"
+        ).encode('utf-8')
+        frame = self.compressor.compress(header + response.content + b"\r\n\r\n")
+        date = fetched_at.strftime('%Y-%m-%d')
+        segment = f"{date}.warc.zst"
+        with self.lock:
+            with open(os.path.join(self.root, segment), 'ab') as f:
+                offset = f.tell()
+                f.write(frame)
+            cursor = self.db.execute(
+                "INSERT INTO records (url, kind, date, fetched_at, status, content_type, segment, offset, length, "
+                "filed_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, kind, date, fetched_at.isoformat(), response.status_code, content_type,
+                 segment, offset, len(frame), normalize_filed_date(filed_date)))
+            self.db.commit()
+        return cursor.lastrowid
+
+    # Case pages are archived before parsing (so a page that breaks the parser is still
+    # kept) and get their filed date once it has been read from the page.
+    def set_filed_date(self, record_id, filed_date):
+        with self.lock:
+            self.db.execute("UPDATE records SET filed_date = ? WHERE rowid = ?",
+                            (normalize_filed_date(filed_date), record_id))
+            self.db.commit()
+
+    def read(self, segment, offset, length):
+        with open(os.path.join(self.root, segment), 'rb') as f:
+            f.seek(offset)
+            record = self.decompressor.decompress(f.read(length))
+        _, payload = record.split(b"\r\n\r\n", 1)
+        return payload[:-4]
+
+    def get(self, url):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT status, content_type, segment, offset, length FROM records "
+                "WHERE url = ? ORDER BY rowid DESC LIMIT 1", (url,)).fetchone()
+        if not row:
+            return None
+        status, content_type, segment, offset, length = row
+        return ArchivedResponse(url, status, content_type, self.read(segment, offset, length))
+
+    # Records whose filed date could not be read fall back to the date they were fetched
+    def urls(self, kind, start_date, end_date):
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT DISTINCT url FROM records WHERE kind = ? AND COALESCE(filed_date, date) BETWEEN ? AND ? "
+                "AND status = 200",
+                (kind, normalize_filed_date(start_date), normalize_filed_date(end_date))).fetchall()
+        return [url for (url,) in rows]
+
+
+class ArchivedResponse:
+    def __init__(self, url, status_code, content_type, content):
+        self.url = url
+        self.status_code = status_code
+        self.headers = {'Content-Type': content_type}
+        self.content = content
+        self.encoding = get_encoding_from_headers(self.headers) or 'utf-8'
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors='replace')
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise Exception(f"{self.status_code} for archived url: {self.url}")
+
+
+# Drop-in replacement for requests.Session that only ever answers from the archive,
+# so a reparse can never touch the network.
+class ArchiveSession:
+    def __init__(self, archive):
+        self.archive = archive
+
+    def get(self, url, headers=None):
+        response = self.archive.get(url)
+        if response is None:
+            print(f"Not in archive: {url}")
+            return ArchivedResponse(url, 404, '', b'')
+        return response
+
+
+def reparse_cases(args):
+    root, urls = args
+    fetcher = DocumentFetcher()
+    fetcher.session = ArchiveSession(ResponseArchive(root))
+    for url in urls:
+        fetcher.fetch_document(url)
+    return fetcher.data
+
+
+def reparse(root, start_date, end_date, output_file, workers=None, chunk_size=50):
+    urls = ResponseArchive(root).urls('case', start_date, end_date)
+    print(f"Reparsing {len(urls)} archived case page(s) from {start_date} to {end_date}")
+    chunks = [(root, urls[i:i + chunk_size]) for i in range(0, len(urls), chunk_size)]
+    records = []
+    with Pool(workers) as pool:
+        for chunk_records in pool.imap_unordered(reparse_cases, chunks):
+            records.extend(chunk_records)
+    # Replace rather than append: a reparse supersedes whatever an earlier run produced
+    pd.DataFrame(records).to_csv(output_file, index=False)
+    print(f"Data saved to {output_file}")
+    return len(records)
+
+
+def filed_date_argument(value):
+    normalized = normalize_filed_date(value)
+    if normalized is None:
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM-DD or MM-DD-YYYY, got {value!r}")
+    return normalized
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline tools for the raw-response archive")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    reparse_parser = subparsers.add_parser('reparse', help="Re-run the extractors over archived pages")
+    reparse_parser.add_argument('--archive', default='archive')
+    reparse_parser.add_argument('--start', required=True, type=filed_date_argument,
+                                help="First filed date (YYYY-MM-DD or MM-DD-YYYY)")
+    reparse_parser.add_argument('--end', required=True, type=filed_date_argument,
+                                help="Last filed date (YYYY-MM-DD or MM-DD-YYYY)")
+    reparse_parser.add_argument('--output', default='reparsed.csv', help="Overwritten on every run")
+    reparse_parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    if args.command == 'reparse':
+        reparse(args.archive, args.start, args.end, args.output, args.workers)
@@ -1,3 +1,4 @@
+import re
 import requests
 from bs4 import BeautifulSoup
 import fitz  # PyMuPDF
@@ -5,62 +6,100 @@ import pytesseract
 from PIL import Image
 from io import BytesIO
 import pandas as pd
+from entities import add_entity_columns
 
 class DocumentFetcher:
-    def __init__(self):
+    def __init__(self, archive=None):
         self.session = requests.Session()
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:91.0) Gecko/20100101 Firefox/91.0'
         }
         self.base_url = 'https://www.oscn.net/dockets/'
         self.data = []
+        self.archive = archive
 
     def fetch_document(self, url):
         print(f"Fetching document from URL: {url}")
-        response = self.session.get(url, headers=self.headers)
-        if response.status_code == 200:
-            print(f"Content of {url}:")
-            self.parse_document(response.text)
-        else:
+        case = self.fetch_case_page(url)
+        if case is None:
             print(f"Failed to fetch document from {url}")
+            return False
+        print(f"Content of {url}:")
+        self.process_case(*case)
+        return True
+
+    # Fetches, archives and parses a case page; returns parse_case's tuple, or None if the
+    # page could not be fetched. The page is archived before parsing, so one that breaks
+    # the parser is still kept, and gets its filed date once that has been read.
+    def fetch_case_page(self, url):
+        response = self.session.get(url, headers=self.headers)
+        if response.status_code != 200:
+            return None
+        record_id = self.archive.store(url, response, kind='case') if self.archive else None
+        case = self.parse_case(response.text)
+        if record_id:
+            self.archive.set_filed_date(record_id, case[1])
+        return case
 
     def parse_document(self, html_content):
+        return self.process_case(*self.parse_case(html_content))
+
+    def process_case(self, case_number, filed_date, judge, documents):
+        first_record = len(self.data)
+        for doc_url, doc_format in documents:
+            self.process_document(doc_url, doc_format, case_number, filed_date, judge)
+
+        # Run entity extraction once over all of this case's documents
+        add_entity_columns(self.data[first_record:])
+        return case_number, filed_date, judge
+
+    def parse_case(self, html_content):
         soup = BeautifulSoup(html_content, 'html.parser')
         
-        # Extract case number
-        case_number = soup.find('strong', string=lambda x: x and 'No.' in x)
+        # Extract case number ("No. PB-2024-722<br>(Probate: PROBATE)" on case pages)
+        case_number = soup.find(lambda tag: tag.name == 'strong' and 'No.' in tag.get_text())
         if case_number:
-            case_number = case_number.get_text(strip=True).replace('No. ', '')
+            case_number = re.search(r'No\.\s*(\S+)', case_number.get_text(' ')).group(1)
             print(f"Case Number: {case_number}")
         
         # Extract filed date
-        filed_date = soup.find('td', string=lambda x: x and 'Filed:' in x)
+        filed_date = self.labelled_value(soup, 'Filed')
         if filed_date:
-            filed_date = filed_date.find_next_sibling('td').get_text(strip=True)
             print(f"Filed Date: {filed_date}")
         
         # Extract judge name
-        judge = soup.find('td', string=lambda x: x and 'Judge:' in x)
+        judge = self.labelled_value(soup, 'Judge')
         if judge:
-            judge = judge.find_next_sibling('td').get_text(strip=True)
             print(f"Judge: {judge}")
         
         # Extract document links
-        doc_links = soup.find_all('a', class_=['doc-tif', 'doc-pdf'])
-        for link in doc_links:
+        documents = []
+        for link in soup.find_all('a', class_=['doc-tif', 'doc-pdf']):
             doc_url = self.base_url + link['href']
             doc_format = link.get_text(strip=True)
             print(f"Document ({doc_format}): {doc_url}")
-            self.process_document(doc_url, doc_format, case_number, filed_date, judge)
+            documents.append((doc_url, doc_format))
+        return case_number, filed_date, judge, documents
+
+    # Case pages put "Filed: 06/03/2024<br>Judge: ..." as bare text in the caption cell;
+    # the older layout has the label and the value in neighbouring cells.
+    def labelled_value(self, soup, label):
+        node = soup.find(string=re.compile(rf'^\s*{label}:'))
+        if node is None:
+            return None
+        value = node.split(':', 1)[1].strip()
+        if not value and node.parent.name == 'td':
+            sibling = node.parent.find_next_sibling('td')
+            value = sibling.get_text(strip=True) if sibling else ''
+        return value or None
 
     def process_document(self, url, doc_format, case_number, filed_date, judge):
         try:
             response = self.session.get(url, headers=self.headers)
             if response.status_code == 200:
-                if doc_format == 'PDF':
-                    text = self.extract_text_from_pdf(response.content)
-                elif doc_format == 'TIFF':
-                    text = self.extract_text_from_tiff(response.content)
+                if self.archive:
+                    self.archive.store(url, response, kind='document', filed_date=filed_date)
+                text = self.extract_text(response.content, doc_format)
                 self.data.append({
                     'Case Number': case_number,
                     'Filed Date': filed_date,
@@ -74,6 +113,13 @@ class DocumentFetcher:
         except Exception as e:
             print(f"Error processing document from {url}: {e}")
 
+    def extract_text(self, content, doc_format):
+        if doc_format == 'PDF':
+            return self.extract_text_from_pdf(content)
+        if doc_format == 'TIFF':
+            return self.extract_text_from_tiff(content)
+        return ""
+
     def extract_text_from_pdf(self, pdf_content):
         try:
             pdf_document = fitz.open(stream=pdf_content, filetype="pdf")
@@ -108,7 +154,8 @@ class DocumentFetcher:
         print(f"Data saved to {output_file}")
 
 if __name__ == "__main__":
-    fetcher = DocumentFetcher()
+    from archive import ResponseArchive
+    fetcher = DocumentFetcher(archive=ResponseArchive())
     target_url = 'https://www.oscn.net/dockets/GetCaseInformation.aspx?db=oklahoma&number=PB-2024-722&cmid=4319201'
     fetcher.fetch_document(target_url)
     fetcher.save_to_csv('outputs.csv')
\ No newline at end of file
@@ -0,0 +1,144 @@
+import json
+import re
+import time
+from datetime import date
+
+# All entity patterns are combined into one precompiled alternation so each page
+# is scanned once with finditer instead of once per pattern.
+# A name is up to five capitalized words (all-caps captions or mixed-case PDF text) and
+# stops at connectors, so "MARY PUBLIC AND JOHN DOE" yields "MARY PUBLIC".
+NAME_WORD = r"(?!(?:AND|And|and|OR|Or|A/K/A|AKA|F/K/A|N/K/A|DECEASED|Deceased)\b)[A-Z][A-Za-z.'\-]*"
+NAME = NAME_WORD + r"(?:[ \t]+" + NAME_WORD + r"){0,4}"
+ALIAS = r"(?i:A/K/A|AKA|F/K/A|N/K/A|ALSO[ \t]+KNOWN[ \t]+AS)"
+
+STREET_SUFFIXES = [
+    'Street', 'St', 'Avenue', 'Ave', 'Road', 'Rd', 'Drive', 'Dr', 'Boulevard', 'Blvd', 'Lane', 'Ln',
+    'Court', 'Ct', 'Place', 'Pl', 'Terrace', 'Ter', 'Way', 'Circle', 'Cir', 'Parkway', 'Pkwy',
+    'Highway', 'Hwy',
+]
+# Street words and the suffix must be capitalized or numbered, so prose such as
+# "12 cats ran down the road" is not taken for an address.
+STREET_SUFFIX = "|".join(sorted(STREET_SUFFIXES + [suffix.upper() for suffix in STREET_SUFFIXES], key=len, reverse=True))
+
+ENTITY_PATTERN = re.compile(
+    # Cheap guard: only word starts and dollar signs can begin an entity, which
+    # lets the engine skip most positions without trying every branch.
+    r"(?:\b|(?=\$))(?:"
+    r"(?P<decedent>(?i:ESTATE\s+OF):?\s+(?P<decedent_name>" + NAME + r")"
+    r"(?:,?\s+" + ALIAS + r"\s+" + NAME + r")*,?\s+(?i:DECEASED))"
+    r"|(?P<party>(?i:(?:PETITIONER|RESPONDENT|PERSONAL[ \t]+REPRESENTATIVE|ADMINISTRAT(?:OR|RIX)"
+    r"|EXECUT(?:OR|RIX)|HEIR|DEVISEE|CLAIMANT)S?)[ \t]*[:,][ \t]*(?P<party_name>" + NAME + r"))"
+    r"|(?P<address>\b\d{1,6}[ \t]+(?:[NSEW]\.?[ \t]+)?(?:[A-Z0-9][A-Za-z0-9.']*[ \t]+){1,4}?"
+    r"(?:" + STREET_SUFFIX + r")\b\.?"
+    r"(?:,?[ \t]+(?P<city>[A-Z][A-Za-z]+(?:[ \t]+[A-Z][A-Za-z]+)?),?[ \t]+(?i:OKLAHOMA|OK)\b\.?"
+    r"(?:[ \t]+(?P<zip>\d{5})(?:-\d{4})?)?)?)"
+    r"|(?P<date>\b(?P<num_month>\d{1,2})[/-](?P<num_day>\d{1,2})[/-](?P<num_year>\d{4}|\d{2})\b"
+    r"|(?P<month>(?i:JAN|FEB|MAR|APR|MAY|JUN|JUL|AUG|SEP|OCT|NOV|DEC))[A-Za-z]*\.?[ \t]+"
+    r"(?P<day>\d{1,2})(?:st|nd|rd|th)?,?[ \t]+(?P<year>\d{4})\b)"
+    # Malformed figures such as "$12,34" are skipped rather than truncated to 12.0
+    r"|(?P<amount>\$[ \t]?(?P<dollars>\d{1,3}(?:,\d{3})+|\d+)(?:\.(?P<cents>\d{2}))?(?!,\d|\.?\d)))"
+)
+
+MONTHS = {
+    'JAN': 1, 'FEB': 2, 'MAR': 3, 'APR': 4, 'MAY': 5, 'JUN': 6,
+    'JUL': 7, 'AUG': 8, 'SEP': 9, 'OCT': 10, 'NOV': 11, 'DEC': 12,
+}
+
+ENTITY_COLUMNS = ['Decedent', 'Parties', 'Property Addresses', 'Dates', 'Amounts']
+
+WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_name(name):
+    return WHITESPACE.sub(' ', name).strip(" .,-").title()
+
+
+def normalize_address(address):
+    return WHITESPACE.sub(' ', address).strip(" ,").upper()
+
+
+def normalize_date(match):
+    if match.group('num_month'):
+        month = int(match.group('num_month'))
+        day = int(match.group('num_day'))
+        year = match.group('num_year')
+    else:
+        month = MONTHS[match.group('month').upper()]
+        day = int(match.group('day'))
+        year = match.group('year')
+    year = int(year) + 2000 if len(year) == 2 else int(year)
+    try:
+        return date(year, month, day).isoformat()
+    except ValueError:
+        return None
+
+
+def normalize_amount(match):
+    dollars = match.group('dollars').replace(',', '')
+    cents = match.group('cents') or '00'
+    return float(f"{dollars}.{cents}")
+
+
+def extract_entities(text):
+    found = {column: [] for column in ENTITY_COLUMNS}
+    for match in ENTITY_PATTERN.finditer(text or ''):
+        kind = match.lastgroup
+        if kind == 'decedent':
+            found['Decedent'].append(normalize_name(match.group('decedent_name')))
+        elif kind == 'party':
+            found['Parties'].append(normalize_name(match.group('party_name')))
+        elif kind == 'address':
+            found['Property Addresses'].append(normalize_address(match.group('address')))
+        elif kind == 'date':
+            normalized = normalize_date(match)
+            if normalized:
+                found['Dates'].append(normalized)
+        elif kind == 'amount':
+            found['Amounts'].append(normalize_amount(match))
+    # Keep first-seen order but drop repeats (captions repeat on every page).
+    entities = {column: list(dict.fromkeys(values)) for column, values in found.items()}
+    entities['Decedent'] = entities['Decedent'][0] if entities['Decedent'] else None
+    return entities
+
+
+def extract_entities_batch(texts):
+    return [extract_entities(text) for text in texts]
+
+
+# List columns are stored as JSON arrays so CSV output can be read back with json.loads.
+def serialize_entities(entities):
+    return {column: json.dumps(value) if isinstance(value, list) else value for column, value in entities.items()}
+
+
+def add_entity_columns(records, text_key='Extracted Text'):
+    for record, entities in zip(records, extract_entities_batch(record.get(text_key) for record in records)):
+        record.update(serialize_entities(entities))
+    return records
+
+
+SYNTHETIC_PAGE = """IN THE DISTRICT COURT IN AND FOR OKLAHOMA COUNTY
+STATE OF OKLAHOMA
+IN THE MATTER OF THE ESTATE OF JOHN Q. PUBLIC, DECEASED.   No. PB-2024-{n}
+PETITION FOR LETTERS OF ADMINISTRATION
+Petitioner: MARY ANN PUBLIC
+Personal Representative: ROBERT L. SMITH
+The decedent died on March {day}, 2024 at Oklahoma City, Oklahoma, and at the time of death
+resided at 1234 N.W. {n} Street, Oklahoma City, OK 73118. The decedent owned real property
+located at 5678 S Western Ave, Moore, OK 73160 with an estimated value of $145,{n:03d}.00
+and personal property of approximately $12,500. Hearing set for 07/{day:02d}/2024 at 9:00 a.m.
+Heir: JAMES PUBLIC
+""" + "The petitioner states that the above information is true and correct to the best of her knowledge.\n" * 8
+
+
+def benchmark(pages=20000):
+    texts = [SYNTHETIC_PAGE.format(n=n % 1000, day=n % 28 + 1) for n in range(pages)]
+    start = time.perf_counter()
+    results = extract_entities_batch(texts)
+    elapsed = time.perf_counter() - start
+    print(f"Extracted entities from {pages} pages in {elapsed:.2f}s "
+          f"({pages / elapsed:,.0f} pages/s, {sum(map(len, texts)) / elapsed / 1e6:.1f} MB/s)")
+    print(f"Sample: {results[0]}")
+
+
+if __name__ == "__main__":
+    benchmark()
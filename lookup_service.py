@@ -0,0 +1,225 @@
+import argparse
+import json
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, quote
+
+from docfetch import DocumentFetcher
+from entities import extract_entities
+
+
+# Least-recently-used cache whose entries also expire ttl seconds after they were stored.
+class HotCache:
+    def __init__(self, max_entries=1024, ttl=600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = (value, time.monotonic() + self.ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+class DisallowedURL(Exception):
+    pass
+
+
+class InFlight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+# Wraps the DocumentFetcher fetch-and-extract path for concurrent callers. Requests for a
+# key that is already being fetched wait on that fetch instead of starting their own, and
+# finished results are served from the HotCache until they expire.
+class CaseLookup:
+    def __init__(self, fetcher=None, cache_size=1024, ttl=600, latency_window=10000):
+        self.fetcher = fetcher or DocumentFetcher()
+        self.cache = HotCache(cache_size, ttl)
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        # Per endpoint ('case' or 'document'); document counts include the loads made for a case
+        self.counters = defaultdict(lambda: dict.fromkeys(('hits', 'misses', 'coalesced', 'errors'), 0))
+        self.latencies = deque(maxlen=latency_window)
+
+    def load(self, key, loader):
+        with self.lock:
+            counts = self.counters[key[0]]
+            value = self.cache.get(key)
+            if value is not None:
+                counts['hits'] += 1
+                return value
+            call = self.in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = InFlight()
+                self.in_flight[key] = call
+                counts['misses'] += 1
+            else:
+                counts['coalesced'] += 1
+        if not leader:
+            call.event.wait()
+            if call.error:
+                raise call.error
+            return call.value
+        try:
+            call.value = loader()
+            with self.lock:
+                self.cache.put(key, call.value)
+            return call.value
+        except Exception as e:
+            call.error = e
+            with self.lock:
+                counts['errors'] += 1
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+            call.event.set()
+
+    def case_url(self, number):
+        return f"{self.fetcher.base_url}GetCaseInformation.aspx?db=oklahoma&number={quote(number)}"
+
+    # Only pages under the fetcher's dockets base URL may be requested, so the service
+    # cannot be used to reach arbitrary (e.g. internal) hosts.
+    def check_url(self, url):
+        allowed = urlparse(self.fetcher.base_url)
+        requested = urlparse(url)
+        if (requested.scheme, requested.netloc) != (allowed.scheme, allowed.netloc) \
+                or not requested.path.startswith(allowed.path) or '..' in requested.path.split('/'):
+            raise DisallowedURL(f"URL is outside {self.fetcher.base_url}: {url}")
+
+    # Keyed on the database and case number so ?number= and ?url= (with or without cmid)
+    # share one fetch, while the same number in another county's database does not
+    def case_key(self, url):
+        query = parse_qs(urlparse(url).query)
+        if 'number' not in query:
+            return ('case', url)
+        return ('case', query.get('db', [''])[0].strip().lower(), query['number'][0].strip().upper())
+
+    def case(self, url):
+        self.check_url(url)
+        return self.load(self.case_key(url), lambda: self.fetch_case(url))
+
+    def document(self, url, doc_format):
+        self.check_url(url)
+        return self.load(('document', url), lambda: self.fetch_document(url, doc_format))
+
+    def fetch_case(self, url):
+        case = self.fetcher.fetch_case_page(url)
+        if case is None:
+            raise Exception(f"Failed to fetch case page {url}")
+        case_number, filed_date, judge, documents = case
+        return {
+            'Case Number': case_number,
+            'Filed Date': filed_date,
+            'Judge': judge,
+            'Case URL': url,
+            'Documents': [self.document(doc_url, doc_format) for doc_url, doc_format in documents],
+        }
+
+    def fetch_document(self, url, doc_format):
+        response = self.fetcher.session.get(url, headers=self.fetcher.headers)
+        response.raise_for_status()
+        if self.fetcher.archive:
+            self.fetcher.archive.store(url, response, kind='document')
+        text = self.fetcher.extract_text(response.content, doc_format)
+        record = {'Document URL': url, 'Document Format': doc_format, 'Extracted Text': text}
+        record.update(extract_entities(text))
+        return record
+
+    def record_latency(self, seconds):
+        with self.lock:
+            self.latencies.append(seconds)
+
+    def stats(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            stats = {}
+            for endpoint in ('case', 'document'):
+                counts = dict(self.counters[endpoint])
+                requests_seen = counts['hits'] + counts['misses'] + counts['coalesced']
+                counts['requests'] = requests_seen
+                counts['hit_ratio'] = round(counts['hits'] / requests_seen, 4) if requests_seen else 0.0
+                stats[endpoint] = counts
+            stats['cached_entries'] = len(self.cache.entries)
+            stats['in_flight'] = len(self.in_flight)
+        for name, q in (('p50_ms', 0.50), ('p99_ms', 0.99)):
+            stats[name] = round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 2) if latencies else None
+        return stats
+
+
+class LookupHandler(BaseHTTPRequestHandler):
+    lookup = None
+
+    def do_GET(self):
+        start = time.perf_counter()
+        parsed = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        try:
+            if parsed.path == '/stats':
+                self.send_json(200, self.lookup.stats())
+                return
+            if parsed.path == '/case' and ('url' in params or 'number' in params):
+                url = params.get('url') or self.lookup.case_url(params['number'])
+                self.send_json(200, self.lookup.case(url))
+            elif parsed.path == '/document' and 'url' in params:
+                self.send_json(200, self.lookup.document(params['url'], params.get('format', 'PDF').upper()))
+            else:
+                self.send_json(404, {'error': f"Unknown request: {self.path}"})
+                return
+        except DisallowedURL as e:
+            self.send_json(403, {'error': str(e)})
+            return
+        except Exception as e:
+            self.send_json(502, {'error': str(e)})
+        self.lookup.record_latency(time.perf_counter() - start)
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(lookup, host='127.0.0.1', port=8080):
+    handler = type('BoundLookupHandler', (LookupHandler,), {'lookup': lookup})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local JSON service for case and document lookups")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--base-url', default=None, help="Dockets base URL, e.g. a local stand-in for oscn.net")
+    parser.add_argument('--cache-size', type=int, default=1024)
+    parser.add_argument('--ttl', type=int, default=600, help="Seconds a cached case stays fresh")
+    args = parser.parse_args()
+    fetcher = DocumentFetcher()
+    if args.base_url:
+        fetcher.base_url = args.base_url
+    server = make_server(CaseLookup(fetcher, args.cache_size, args.ttl), args.host, args.port)
+    print(f"Serving case lookups on http://{args.host}:{args.port}")
+    server.serve_forever()
@@ -10,9 +10,11 @@ import io
 import logging
 import pytesseract
 import os
+from docfetch import DocumentFetcher
+from results_table import typed_results_frame, save_results
 
 class Scraper:
-    def __init__(self):
+    def __init__(self, archive=None):
         self.session = requests.Session()
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:91.0) Gecko/20100101 Firefox/91.0'
@@ -27,8 +29,14 @@ class Scraper:
         self.handler.setFormatter(self.formatter)
         self.logger.addHandler(self.handler)
         self.data = []
+        self.archive = archive
+        # Case pages are fetched, archived and parsed by the shared DocumentFetcher path
+        self.fetcher = DocumentFetcher(archive)
+        self.fetcher.session = self.session
+        self.fetcher.headers = self.headers
+        self.fetcher.base_url = self.case_base_url
 
-    def scrape_table(self, date_str, output_file='output.csv'):
+    def scrape_table(self, date_str, output_dir='output_parquet'):
         self.logger.info(f"Starting to scrape for date: {date_str}")
         url = self.base_url + date_str
         self.logger.info(f"Sending GET request to URL: {url}")
@@ -42,6 +50,8 @@ class Scraper:
         except Exception as err:
             self.logger.error(f'An error occurred: {err}')
             return
+        if self.archive:
+            self.archive.store(url, response, kind='results', filed_date=date_str)
         
         soup = BeautifulSoup(response.text, 'html.parser')
         self.logger.info("Soup object created successfully.")
@@ -52,58 +62,42 @@ class Scraper:
             raise ValueError("Table with specified class not found.")
         self.logger.info("Table found successfully.")
         
-        headers = [th.text.strip() for th in table.find_all('tr')[0].find_all('th')]
+        headers = [th.text.replace('\xa0', ' ').strip() for th in table.find_all('tr')[0].find_all('th')]
         self.logger.info(f"Extracted headers: {headers}")
         rows = table.find_all('tr')[1:]
         data = [[td.text.strip() for td in row.find_all('td')] for row in rows]
-        self.data = pd.DataFrame(data, columns=headers)
-        self.save_to_csv(output_file)
+        df = typed_results_frame(pd.DataFrame(data, columns=headers))
+        output_file = save_results(df, date_str, output_dir)
+        self.logger.info(f"Results table saved to {output_file}")
+        return df
 
     def fetch_document(self, url):
         self.logger.info(f"Fetching document from URL: {url}")
         try:
-            response = self.session.get(url, headers=self.headers)
-            if response.status_code == 200:
+            case = self.fetcher.fetch_case_page(url)
+            if case:
                 self.logger.info(f"Content of {url}:")
-                self.parse_document(response.text)
+                self.process_case(*case)
             else:
                 self.logger.error(f"Failed to fetch document from {url}")
         except Exception as e:
             self.logger.error(f"Error fetching document from {url}: {e}")
 
-    def parse_document(self, html_content):
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Extract case number
-        case_number = soup.find('strong', string=lambda x: x and 'No.' in x)
-        if case_number:
-            case_number = case_number.get_text(strip=True).replace('No. ', '')
-            self.logger.info(f"Case Number: {case_number}")
-        
-        # Extract filed date
-        filed_date = soup.find('td', string=lambda x: x and 'Filed:' in x)
-        if filed_date:
-            filed_date = filed_date.find_next_sibling('td').get_text(strip=True)
-            self.logger.info(f"Filed Date: {filed_date}")
-        
-        # Extract judge name
-        judge = soup.find('td', string=lambda x: x and 'Judge:' in x)
-        if judge:
-            judge = judge.find_next_sibling('td').get_text(strip=True)
-            self.logger.info(f"Judge: {judge}")
-        
-        # Extract document links
-        doc_links = soup.find_all('a', class_=['doc-tif', 'doc-pdf'])
-        for link in doc_links:
-            doc_url = self.case_base_url + link['href']
-            doc_format = link.get_text(strip=True)
+    def process_case(self, case_number, filed_date, judge, documents):
+        self.logger.info(f"Case Number: {case_number}")
+        self.logger.info(f"Filed Date: {filed_date}")
+        self.logger.info(f"Judge: {judge}")
+        for doc_url, doc_format in documents:
             self.logger.info(f"Document ({doc_format}): {doc_url}")
             self.process_document(doc_url, doc_format, case_number, filed_date, judge)
+        return filed_date
 
     def process_document(self, url, doc_format, case_number, filed_date, judge):
         try:
             response = self.session.get(url, headers=self.headers)
             if response.status_code == 200:
+                if self.archive:
+                    self.archive.store(url, response, kind='document', filed_date=filed_date)
                 if doc_format == 'PDF':
                     text = self.extract_text_from_pdf(response.content)
                 elif doc_format == 'TIFF':
@@ -160,7 +154,8 @@ class Scraper:
         self.logger.info(f"Data saved to {output_file}")
 
 if __name__ == "__main__":
-    scraper = Scraper()
+    from archive import ResponseArchive
+    scraper = Scraper(archive=ResponseArchive())
     scraper.scrape_table('06-01-2024')
     target_url = 'https://www.oscn.net/dockets/GetCaseInformation.aspx?db=oklahoma&number=PB-2024-722&cmid=4319201'
     scraper.fetch_document(target_url)
@@ -0,0 +1,390 @@
+import argparse
+import csv
+import os
+import resource
+import tempfile
+import threading
+import time
+from collections import deque
+
+import pandas as pd
+
+from docfetch import DocumentFetcher
+from entities import ENTITY_COLUMNS, add_entity_columns
+
+RECORD_COLUMNS = ['Case Number', 'Filed Date', 'Judge', 'Document URL', 'Document Format', 'Extracted Text']
+
+
+def item_size(item):
+    size = 0
+    if item.get('content') is not None:
+        size += len(item['content'])
+    if item.get('Extracted Text'):
+        size += len(item['Extracted Text'])
+    return size
+
+
+# Stages call this right before they need a spilled payload; the temp file is removed once read.
+def load_content(item):
+    path = item.pop('content_path', None)
+    if path:
+        with open(path, 'rb') as f:
+            item['content'] = f.read()
+        os.remove(path)
+        item.pop('spilled_bytes', None)
+    return item.pop('content')
+
+
+def discard_spill(item):
+    path = item.pop('content_path', None)
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+# Returns whether the output still needs a header row. A missing or blank file (the
+# checked-in outputs.csv is a single newline) starts fresh; a file with other columns is
+# refused rather than appended to.
+def prepare_csv(output_file, columns):
+    try:
+        with open(output_file, newline='') as f:
+            header = next(csv.reader(f), [])
+    except FileNotFoundError:
+        header = []
+    if not any(header):
+        with open(output_file, 'w'):
+            pass
+        return True
+    if header != columns:
+        raise ValueError(f"{output_file} has columns {header}, expected {columns}; choose a new output file")
+    return False
+
+
+class QueueClosed(Exception):
+    pass
+
+
+# A queue bounded by item count, in-memory payload bytes and spilled bytes on disk. put()
+# blocks while any budget is exhausted, which slows the upstream stage down to the speed of
+# the downstream one. Payloads larger than spill_bytes are written to a temp file and only
+# the path is queued; already spilled items move between queues without being read back.
+class ByteBoundedQueue:
+    def __init__(self, name, max_bytes=64 * 1024 * 1024, max_items=1000, spill_bytes=4 * 1024 * 1024,
+                 spill_dir=None, max_spill_bytes=1024 * 1024 * 1024):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.max_items = max_items
+        self.spill_bytes = spill_bytes
+        self.spill_dir = spill_dir
+        self.max_spill_bytes = max_spill_bytes
+        self.items = deque()
+        self.bytes = 0
+        self.disk_bytes = 0
+        self.closed = False
+        self.condition = threading.Condition()
+        self.peak_items = 0
+        self.peak_bytes = 0
+        self.peak_disk_bytes = 0
+        self.spilled = 0
+        self.blocked_seconds = 0.0
+
+    def full(self, size, disk_size):
+        if not self.items:
+            # An oversized item is still let through on an empty queue so it cannot deadlock
+            return False
+        return (len(self.items) >= self.max_items or self.bytes + size > self.max_bytes
+                or (disk_size and self.disk_bytes + disk_size > self.max_spill_bytes))
+
+    def put(self, item):
+        content = item.get('content')
+        if content is not None and len(content) > self.spill_bytes:
+            fd, path = tempfile.mkstemp(suffix='.spill', dir=self.spill_dir)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            item = dict(item, content=None, content_path=path, spilled_bytes=len(content))
+            self.spilled += 1
+        size = item_size(item)
+        disk_size = item.get('spilled_bytes', 0)
+        with self.condition:
+            start = time.perf_counter()
+            while not self.closed and self.full(size, disk_size):
+                self.condition.wait()
+            self.blocked_seconds += time.perf_counter() - start
+            if self.closed:
+                discard_spill(item)
+                raise QueueClosed(f"{self.name} queue is closed")
+            self.items.append((item, size, disk_size))
+            self.bytes += size
+            self.disk_bytes += disk_size
+            self.peak_items = max(self.peak_items, len(self.items))
+            self.peak_bytes = max(self.peak_bytes, self.bytes)
+            self.peak_disk_bytes = max(self.peak_disk_bytes, self.disk_bytes)
+            self.condition.notify_all()
+
+    def get(self):
+        with self.condition:
+            while not self.items and not self.closed:
+                self.condition.wait()
+            if not self.items:
+                return None
+            item, size, disk_size = self.items.popleft()
+            self.bytes -= size
+            self.disk_bytes -= disk_size
+            self.condition.notify_all()
+        return item
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    # Used when a stage fails: wakes every blocked producer and consumer and drops queued work.
+    def abort(self):
+        with self.condition:
+            self.closed = True
+            for item, _, _ in self.items:
+                discard_spill(item)
+            self.items.clear()
+            self.bytes = 0
+            self.disk_bytes = 0
+            self.condition.notify_all()
+
+    def stats(self):
+        with self.condition:
+            return {
+                'queue': self.name,
+                'depth': len(self.items),
+                'bytes': self.bytes,
+                'disk_bytes': self.disk_bytes,
+                'peak_depth': self.peak_items,
+                'peak_bytes': self.peak_bytes,
+                'peak_disk_bytes': self.peak_disk_bytes,
+                'spilled': self.spilled,
+                'blocked_seconds': round(self.blocked_seconds, 2),
+            }
+
+
+# fetch -> extract -> OCR -> write, each stage on its own threads and connected by
+# ByteBoundedQueues. Records are appended to the output CSV in batches instead of
+# accumulating in DocumentFetcher.data, so memory stays flat for long backfills.
+class DocumentPipeline:
+    def __init__(self, fetcher=None, output_file='outputs.csv', fetch_workers=4, extract_workers=2,
+                 ocr_workers=2, max_queue_bytes=64 * 1024 * 1024, max_queue_items=1000,
+                 spill_bytes=4 * 1024 * 1024, spill_dir=None, max_spill_bytes=1024 * 1024 * 1024,
+                 flush_every=100, report_interval=10):
+        self.fetcher = fetcher or DocumentFetcher()
+        self.output_file = output_file
+        self.fetch_workers = fetch_workers
+        self.extract_workers = extract_workers
+        self.ocr_workers = ocr_workers
+        self.flush_every = flush_every
+        self.report_interval = report_interval
+        self.case_queue = ByteBoundedQueue('cases', max_items=max_queue_items)
+        self.extract_queue = ByteBoundedQueue('fetch->extract', max_queue_bytes, max_queue_items,
+                                              spill_bytes, spill_dir, max_spill_bytes)
+        self.ocr_queue = ByteBoundedQueue('extract->ocr', max_queue_bytes, max_queue_items,
+                                          spill_bytes, spill_dir, max_spill_bytes)
+        self.write_queue = ByteBoundedQueue('ocr->write', max_queue_bytes, max_queue_items,
+                                            spill_bytes, spill_dir, max_spill_bytes)
+        self.queues = [self.case_queue, self.extract_queue, self.ocr_queue, self.write_queue]
+        self.written = 0
+        self.write_header = True
+        self.error = None
+        self.done = threading.Event()
+
+    def fetch_stage(self):
+        while True:
+            item = self.case_queue.get()
+            if item is None:
+                return
+            url = item['url']
+            try:
+                case = self.fetcher.fetch_case_page(url)
+            except Exception as e:
+                print(f"Error fetching case from {url}: {e}")
+                continue
+            if case is None:
+                print(f"Failed to fetch document from {url}")
+                continue
+            case_number, filed_date, judge, documents = case
+            archive = self.fetcher.archive
+            # One failing document must not cost the rest of the case
+            for doc_url, doc_format in documents:
+                try:
+                    response = self.fetcher.session.get(doc_url, headers=self.fetcher.headers)
+                    if response.status_code != 200:
+                        print(f"Failed to download document from {doc_url}")
+                        continue
+                    if archive:
+                        archive.store(doc_url, response, kind='document', filed_date=filed_date)
+                except Exception as e:
+                    print(f"Error fetching document from {doc_url}: {e}")
+                    continue
+                self.extract_queue.put({
+                    'Case Number': case_number,
+                    'Filed Date': filed_date,
+                    'Judge': judge,
+                    'Document URL': doc_url,
+                    'Document Format': doc_format,
+                    'content': response.content,
+                })
+
+    def extract_stage(self):
+        while True:
+            item = self.extract_queue.get()
+            if item is None:
+                return
+            if item['Document Format'] == 'TIFF':
+                self.ocr_queue.put(item)
+                continue
+            item['Extracted Text'] = self.fetcher.extract_text(load_content(item), item['Document Format'])
+            self.write_queue.put(item)
+
+    def ocr_stage(self):
+        while True:
+            item = self.ocr_queue.get()
+            if item is None:
+                return
+            item['Extracted Text'] = self.fetcher.extract_text_from_tiff(load_content(item))
+            self.write_queue.put(item)
+
+    def write_stage(self):
+        batch = []
+        while True:
+            item = self.write_queue.get()
+            if item is not None:
+                batch.append(item)
+            if batch and (item is None or len(batch) >= self.flush_every):
+                self.flush(batch)
+                batch = []
+            if item is None:
+                return
+
+    def prepare_output(self):
+        self.write_header = prepare_csv(self.output_file, RECORD_COLUMNS + ENTITY_COLUMNS)
+
+    def flush(self, records):
+        add_entity_columns(records)
+        df = pd.DataFrame(records, columns=RECORD_COLUMNS + ENTITY_COLUMNS)
+        df.to_csv(self.output_file, mode='a', header=self.write_header, index=False)
+        self.write_header = False
+        self.written += len(records)
+        print(f"Appended {len(records)} record(s) to {self.output_file}")
+
+    def stats(self):
+        return [queue.stats() for queue in self.queues]
+
+    def report(self):
+        while not self.done.wait(self.report_interval):
+            print(" | ".join(f"{s['queue']}: {s['depth']} items, {s['bytes'] / 1e6:.1f} MB, "
+                             f"{s['disk_bytes'] / 1e6:.1f} MB spilled"
+                             for s in self.stats()))
+
+    def run_stage(self, target):
+        try:
+            target()
+        except QueueClosed:
+            pass
+        except Exception as e:
+            print(f"Pipeline stage {target.__name__} failed: {e}")
+            if self.error is None:
+                self.error = e
+            # Unblock every other stage so run() can return and re-raise
+            for queue in self.queues:
+                queue.abort()
+
+    def start_stage(self, target, count):
+        threads = [threading.Thread(target=self.run_stage, args=(target,), daemon=True) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def run(self, case_urls):
+        self.prepare_output()
+        reporter = threading.Thread(target=self.report, daemon=True)
+        reporter.start()
+        stages = [
+            (self.case_queue, self.start_stage(self.fetch_stage, self.fetch_workers)),
+            (self.extract_queue, self.start_stage(self.extract_stage, self.extract_workers)),
+            (self.ocr_queue, self.start_stage(self.ocr_stage, self.ocr_workers)),
+            (self.write_queue, self.start_stage(self.write_stage, 1)),
+        ]
+        try:
+            for url in case_urls:
+                self.case_queue.put({'url': url})
+        except QueueClosed:
+            pass
+        # Close each queue once everything feeding it has finished, in stage order
+        for queue, threads in stages:
+            queue.close()
+            for thread in threads:
+                thread.join()
+        self.done.set()
+        for s in self.stats():
+            print(s)
+        if self.error:
+            raise self.error
+        return self.written
+
+
+class SyntheticResponse:
+    def __init__(self, content):
+        self.status_code = 200
+        self.content = content
+        self.text = content.decode('latin-1')
+        self.headers = {}
+
+
+# Answers case pages with documents_per_case TIFF links and every document with
+# document_size zero bytes, so a run measures the queues rather than the network.
+class SyntheticSession:
+    def __init__(self, document_size, documents_per_case):
+        self.document = b'\0' * document_size
+        self.documents_per_case = documents_per_case
+
+    def get(self, url, headers=None):
+        if url.endswith('.tif'):
+            return SyntheticResponse(self.document)
+        number = url.split('number=')[1]
+        links = "".join(f'<a class="doc-tif" href="{number}-{i}.tif">TIFF</a>' for i in range(self.documents_per_case))
+        return SyntheticResponse(f'<strong>No. {number}</strong>{links}'.encode())
+
+
+def benchmark(cases=2000, documents_per_case=3, document_size=1024 * 1024, max_queue_mb=16, output_file=None):
+    fetcher = DocumentFetcher()
+    fetcher.session = SyntheticSession(document_size, documents_per_case)
+    fetcher.extract_text_from_tiff = lambda content: ""
+    with tempfile.TemporaryDirectory() as spill_dir:
+        pipeline = DocumentPipeline(fetcher, output_file or os.path.join(spill_dir, 'benchmark.csv'),
+                                    max_queue_bytes=max_queue_mb * 1024 * 1024, spill_dir=spill_dir,
+                                    report_interval=3600)
+        urls = [f"https://www.oscn.net/dockets/GetCaseInformation.aspx?number=PB-2024-{n}" for n in range(cases)]
+        start = time.perf_counter()
+        written = pipeline.run(urls)
+        elapsed = time.perf_counter() - start
+    payload = cases * documents_per_case * document_size
+    # ru_maxrss is in kilobytes on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"Wrote {written} records ({payload / 1e6:,.0f} MB of documents) in {elapsed:.2f}s "
+          f"({written / elapsed:,.0f} documents/s), peak RSS {peak_rss:,.0f} MB")
+    for stats in pipeline.stats():
+        print(f"{stats['queue']}: peak {stats['peak_bytes'] / 1e6:.1f} MB in memory, "
+              f"{stats['peak_disk_bytes'] / 1e6:.1f} MB spilled")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch, extract, OCR and write cases through bounded queues")
+    parser.add_argument('urls_file', nargs='?', help="File with one GetCaseInformation.aspx URL per line")
+    parser.add_argument('--output', default='outputs.csv')
+    parser.add_argument('--max-queue-mb', type=int, default=64)
+    parser.add_argument('--benchmark', type=int, metavar='CASES',
+                        help="Run CASES synthetic cases through the queues and report peak memory")
+    args = parser.parse_args()
+    if args.benchmark:
+        benchmark(args.benchmark, max_queue_mb=args.max_queue_mb)
+    elif args.urls_file:
+        with open(args.urls_file) as f:
+            urls = [line.strip() for line in f if line.strip()]
+        pipeline = DocumentPipeline(output_file=args.output, max_queue_bytes=args.max_queue_mb * 1024 * 1024)
+        pipeline.run(urls)
+    else:
+        parser.error("a URLs file or --benchmark is required")
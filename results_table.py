@@ -0,0 +1,74 @@
+import os
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+CASE_NUMBER_PATTERN = r'^(?P<court>(?:[A-Z]{2,3}-)?)(?P<type>[A-Z]{1,4})-(?P<year>\d{2,4})-(?P<sequence>\d+)'
+CATEGORICAL_COLUMNS = ['Case Type', 'Court', 'Judge', 'County', 'Status']
+DATE_FORMAT = '%m/%d/%Y'
+
+
+def find_column(df, *words):
+    for column in df.columns:
+        if all(word in column.lower() for word in words):
+            return column
+    return None
+
+
+def to_series(array, index):
+    return array.to_pandas().set_axis(index)
+
+
+# Turns the all-string results table into a typed one using vectorized pandas/pyarrow ops only:
+# dates become datetime64, case numbers are split into type/year/sequence, and repetitive
+# text columns become categoricals. Remaining text is stored as pyarrow strings. The
+# dtypes depend only on the column names, never on the data, so every partition written
+# by save_results shares one schema.
+def typed_results_frame(df):
+    df = df.copy()
+    # OSCN pads header text with &nbsp; ("Case\xa0Number")
+    df.columns = [str(column).replace('\xa0', ' ').strip() for column in df.columns]
+
+    for column in df.columns:
+        if 'date' in column.lower() or 'filed' in column.lower():
+            # A fixed unit keeps the schema identical across daily partitions
+            df[column] = pd.to_datetime(df[column], format=DATE_FORMAT, errors='coerce').astype('datetime64[us]')
+
+    case_column = find_column(df, 'case', 'number') or find_column(df, 'case')
+    if case_column:
+        df[case_column] = df[case_column].str.strip().str.upper()
+        # pyarrow's regex kernel splits the whole column at once instead of row by row
+        parts = pc.extract_regex(pa.array(df[case_column], type=pa.string(), from_pandas=True),
+                                 CASE_NUMBER_PATTERN)
+        year = pc.cast(pc.struct_field(parts, 'year'), pa.int16())
+        year = pc.if_else(pc.less(year, 100), pc.add(year, 2000), year)
+        df['Case Type'] = to_series(pc.struct_field(parts, 'type'), df.index).astype('category')
+        df['Case Year'] = to_series(year, df.index).astype('Int16')
+        sequence = pc.cast(pc.struct_field(parts, 'sequence'), pa.int32())
+        df['Case Sequence'] = to_series(sequence, df.index).astype('Int32')
+        court = pc.utf8_rtrim(pc.struct_field(parts, 'court'), '-')
+        df['Court'] = to_series(court, df.index).replace('', None)
+
+    for column in df.columns:
+        if column in CATEGORICAL_COLUMNS:
+            df[column] = df[column].astype('category')
+        elif pd.api.types.is_string_dtype(df[column]) or pd.api.types.is_object_dtype(df[column]):
+            df[column] = df[column].astype('string[pyarrow]')
+    return df
+
+
+# One Parquet file per filed date under output_dir. Re-scraping a day replaces only that
+# day's file, and load_results reads the whole directory back as a single typed frame.
+def save_results(df, date_str, output_dir='output_parquet'):
+    os.makedirs(output_dir, exist_ok=True)
+    filed_date = datetime.strptime(date_str, '%m-%d-%Y').date().isoformat()
+    output_file = os.path.join(output_dir, f"{filed_date}.parquet")
+    df.to_parquet(output_file, index=False)
+    print(f"Data saved to '{output_file}'.")
+    return output_file
+
+
+def load_results(output_dir='output_parquet'):
+    return pd.read_parquet(output_dir)
@@ -0,0 +1,44 @@
+import os
+import sys
+
+import fitz
+import requests
+
+# The scraper modules live at the repository root rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# Shared stand-ins for requests objects, imported by the test modules with `from conftest import ...`
+
+class Response:
+    def __init__(self, content=b'', status_code=200, headers=None):
+        if isinstance(content, str):
+            content = content.encode()
+        self.status_code = status_code
+        self.content = content
+        self.text = content.decode('latin-1')
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(str(self.status_code))
+
+
+# Answers every GET with answer(url), which returns a Response or an exception to raise.
+class StubSession:
+    def __init__(self, answer):
+        self.answer = answer
+        self.requests = []
+
+    def get(self, url, headers=None):
+        self.requests.append(url)
+        response = self.answer(url)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def make_pdf(text):
+    document = fitz.open()
+    document.new_page().insert_text((50, 50), text)
+    return document.tobytes()
@@ -0,0 +1,96 @@
+import argparse
+import os
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytest
+
+from archive import ArchiveSession, ResponseArchive, filed_date_argument, reparse
+from conftest import Response, StubSession, make_pdf
+from docfetch import DocumentFetcher
+
+CASE_URL = 'https://www.oscn.net/dockets/GetCaseInformation.aspx?db=oklahoma&number={number}'
+CASE_PAGE = """<html><table class="caseStyle"><tr><td>IN THE MATTER OF THE ESTATE OF JANE DOE, DECEASED</td>
+<td><strong>No. {number}<br>(Probate: PROBATE)</strong><br><br>Filed: {filed}<br><br><br>Judge: Doe, John<br></td>
+</tr></table><a class="doc-pdf" href="{number}.pdf">PDF</a></html>"""
+PAGE_SOURCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'webfiles', 'page_source.html')
+
+
+def online_session(filed_dates):
+    def answer(url):
+        if url.endswith('.pdf'):
+            return Response(make_pdf("ESTATE OF JANE DOE, DECEASED"), headers={'Content-Type': 'application/pdf'})
+        number = url.split('number=')[1]
+        page = CASE_PAGE.format(number=number, filed=filed_dates[number])
+        return Response(page, headers={'Content-Type': 'text/html; charset=utf-8'})
+    return StubSession(answer)
+
+
+@pytest.fixture
+def archive_root(tmp_path):
+    filed_dates = {'PB-2024-1': '07/03/2024', 'PB-2023-9': '12/30/2023'}
+    fetcher = DocumentFetcher(archive=ResponseArchive(str(tmp_path / 'archive')))
+    fetcher.session = online_session(filed_dates)
+    for number in filed_dates:
+        fetcher.fetch_document(CASE_URL.format(number=number))
+    return str(tmp_path / 'archive')
+
+
+def test_archived_response_round_trips(archive_root):
+    response = ArchiveSession(ResponseArchive(archive_root)).get(CASE_URL.format(number='PB-2024-1'))
+    assert response.status_code == 200
+    assert 'No. PB-2024-1' in response.text
+
+
+def test_missing_url_is_a_404_not_a_network_request(archive_root):
+    response = ArchiveSession(ResponseArchive(archive_root)).get('https://www.oscn.net/elsewhere')
+    assert response.status_code == 404
+
+
+def test_urls_filter_on_filed_date(archive_root):
+    archive = ResponseArchive(archive_root)
+    assert archive.urls('case', '2024-01-01', '2024-12-31') == [CASE_URL.format(number='PB-2024-1')]
+    assert archive.urls('case', '12-01-2023', '12-31-2023') == [CASE_URL.format(number='PB-2023-9')]
+
+
+def test_reparse_replaces_output(archive_root, tmp_path):
+    output = str(tmp_path / 'reparsed.csv')
+    reparse(archive_root, '2024-01-01', '2024-12-31', output, workers=2)
+    reparse(archive_root, '2024-01-01', '2024-12-31', output, workers=2)
+    df = pd.read_csv(output)
+    assert df['Case Number'].tolist() == ['PB-2024-1']
+    assert df['Decedent'].tolist() == ['Jane Doe']
+
+
+def test_filed_date_argument_validates_format():
+    assert filed_date_argument('07-03-2024') == '2024-07-03'
+    with pytest.raises(argparse.ArgumentTypeError):
+        filed_date_argument('2024/07/03')
+
+
+def test_case_page_layout_is_parsed():
+    with open(PAGE_SOURCE, encoding='utf-8') as f:
+        case_number, filed_date, judge, documents = DocumentFetcher().parse_case(f.read())
+    assert (case_number, filed_date, judge) == ('PB-2024-722', '06/03/2024', 'Harrington, Michelle')
+    assert ('https://www.oscn.net/dockets/GetDocument.aspx?ct=oklahoma&bc=1058926214&cn=PB-2024-722&fmt=pdf',
+            'PDF') in documents
+
+
+def test_saved_case_page_is_indexed_by_its_filed_date(tmp_path):
+    with open(PAGE_SOURCE, 'rb') as f:
+        page = f.read()
+    url = CASE_URL.format(number='PB-2024-722')
+    fetcher = DocumentFetcher(archive=ResponseArchive(str(tmp_path / 'archive')))
+    fetcher.session = StubSession(lambda requested: Response(page) if requested == url else Response(status_code=404))
+    fetcher.fetch_document(url)
+    assert fetcher.archive.urls('case', '2024-06-03', '2024-06-03') == [url]
+
+
+def test_pages_without_a_filed_date_fall_back_to_the_fetch_date(tmp_path):
+    url = CASE_URL.format(number='PB-2024-9')
+    fetcher = DocumentFetcher(archive=ResponseArchive(str(tmp_path / 'archive')))
+    fetcher.session = StubSession(lambda requested: Response("<strong>No. PB-2024-9</strong>"))
+    fetcher.fetch_document(url)
+    # The archive names its segments by UTC date
+    today = datetime.now(timezone.utc).date().isoformat()
+    assert fetcher.archive.urls('case', today, today) == [url]
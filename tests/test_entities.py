@@ -0,0 +1,65 @@
+import json
+
+from entities import add_entity_columns, extract_entities
+
+
+def test_decedent_from_results_caption():
+    caption = "IN THE MATTER OF THE ESTATE OF DAVID GENE LONG, DECEASED."
+    assert extract_entities(caption)['Decedent'] == 'David Gene Long'
+
+
+def test_decedent_with_alias_clause():
+    caption = "IN THE MATTER OF THE ESTATE OF RONALD WAYNE SPRUILL, A/K/A RONALD SPRUILL, DECEASED"
+    assert extract_entities(caption)['Decedent'] == 'Ronald Wayne Spruill'
+
+
+def test_decedent_in_mixed_case_wrapped_text():
+    assert extract_entities("Estate of John Smith, Deceased")['Decedent'] == 'John Smith'
+    caption = "IN THE MATTER OF THE ESTATE OF\nCLARINDA S. WOLFORD SUTTON,\nDECEASED"
+    assert extract_entities(caption)['Decedent'] == 'Clarinda S. Wolford Sutton'
+
+
+def test_party_name_stops_at_connector():
+    entities = extract_entities("Petitioner: MARY ANN PUBLIC AND JOHN DOE")
+    assert entities['Parties'] == ['Mary Ann Public']
+
+
+def test_address_with_city_and_zip():
+    entities = extract_entities("resided at 1234 N.W. 5 Street, Oklahoma City, OK 73118.")
+    assert entities['Property Addresses'] == ['1234 N.W. 5 STREET, OKLAHOMA CITY, OK 73118']
+
+
+def test_prose_is_not_an_address():
+    assert extract_entities("12 cats ran down the road")['Property Addresses'] == []
+
+
+def test_dates_are_validated_and_normalized():
+    entities = extract_entities("Hearing 02/30/2024, moved to 02/29/2024 then March 5, 2024.")
+    assert entities['Dates'] == ['2024-02-29', '2024-03-05']
+
+
+def test_amounts():
+    entities = extract_entities("valued at $145,000.00 and $12,500, not $12,34")
+    assert entities['Amounts'] == [145000.0, 12500.0]
+
+
+def test_add_entity_columns_serializes_lists_as_json():
+    records = [{'Extracted Text': "Heir: JAMES PUBLIC owed $10.50"}]
+    add_entity_columns(records)
+    assert json.loads(records[0]['Parties']) == ['James Public']
+    assert json.loads(records[0]['Amounts']) == [10.5]
+    assert records[0]['Decedent'] is None
+
+
+def test_decedent_after_colon_caption():
+    caption = "IN THE MATTER OF THE ESTATE OF: RUBY DEAN KING, DECEASED"
+    assert extract_entities(caption)['Decedent'] == 'Ruby Dean King'
+
+
+def test_address_with_spelled_out_state_keeps_zip():
+    entities = extract_entities("1200 NW 63rd Street, Oklahoma City, Oklahoma 73116")
+    assert entities['Property Addresses'] == ['1200 NW 63RD STREET, OKLAHOMA CITY, OKLAHOMA 73116']
+
+
+def test_mixed_case_plural_party_role():
+    assert extract_entities("Heirs: JOHN SMITH")['Parties'] == ['John Smith']
@@ -0,0 +1,122 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from conftest import make_pdf
+from docfetch import DocumentFetcher
+from lookup_service import CaseLookup, make_server
+
+
+PDF = make_pdf("ESTATE OF JANE DOE, DECEASED $1,200.50")
+CASE_PAGE = b"<html><strong>No. PB-2024-722</strong><a class='doc-pdf' href='d1.pdf'>PDF</a></html>"
+
+
+# Local stand-in for oscn.net that counts requests per path. Case pages are held back
+# until release is set, so a test can get every concurrent lookup in flight first.
+class StandInHandler(BaseHTTPRequestHandler):
+    requests = []
+    release = threading.Event()
+
+    def do_GET(self):
+        self.requests.append(self.path)
+        if 'GetCaseInformation' in self.path:
+            self.release.wait(10)
+        body = PDF if self.path.endswith('.pdf') else CASE_PAGE
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def service():
+    StandInHandler.requests = []
+    StandInHandler.release.set()
+    stand_in = start(ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler))
+    fetcher = DocumentFetcher()
+    fetcher.base_url = f"http://127.0.0.1:{stand_in.server_port}/dockets/"
+    lookup = CaseLookup(fetcher, ttl=1)
+    server = start(make_server(lookup, port=0))
+    yield f"http://127.0.0.1:{server.server_port}", fetcher.base_url, lookup
+    server.shutdown()
+    stand_in.shutdown()
+
+
+def get(url):
+    with urllib.request.urlopen(url) as response:
+        return json.load(response)
+
+
+def upstream_case_fetches():
+    return sum('GetCaseInformation' in path for path in StandInHandler.requests)
+
+
+def test_concurrent_lookups_share_one_fetch_and_cache(service):
+    base, dockets, lookup = service
+    StandInHandler.release.clear()
+    case_url = urllib.request.quote(f"{dockets}GetCaseInformation.aspx?db=oklahoma&number=PB-2024-722&cmid=1")
+    paths = ['/case?number=PB-2024-722'] * 10 + [f'/case?url={case_url}'] * 10
+    results = []
+    threads = [threading.Thread(target=lambda p=p: results.append(get(base + p))) for p in paths]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 10
+    while lookup.stats()['case']['requests'] < 20 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    StandInHandler.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 20
+    assert results[0]['Documents'][0]['Decedent'] == 'Jane Doe'
+    assert upstream_case_fetches() == 1
+    assert len(StandInHandler.requests) == 2
+
+    get(base + '/case?number=PB-2024-722')
+    assert upstream_case_fetches() == 1
+
+    stats = get(base + '/stats')
+    assert stats['case'] == {'hits': 1, 'misses': 1, 'coalesced': 19, 'errors': 0,
+                             'requests': 21, 'hit_ratio': round(1 / 21, 4)}
+    # The case's document is loaded once, by the fetch that led
+    assert stats['document']['requests'] == 1
+    assert stats['p50_ms'] is not None and stats['p99_ms'] >= stats['p50_ms']
+
+
+def test_case_key_includes_the_database():
+    lookup = CaseLookup(DocumentFetcher())
+    oklahoma = lookup.case_key(lookup.case_url('pb-2024-722 '))
+    with_cmid = lookup.case_key(f"{lookup.fetcher.base_url}GetCaseInformation.aspx?db=oklahoma&number=PB-2024-722&cmid=1")
+    tulsa = lookup.case_key(f"{lookup.fetcher.base_url}GetCaseInformation.aspx?db=tulsa&number=PB-2024-722")
+    assert oklahoma == with_cmid
+    assert oklahoma != tulsa
+
+
+def test_cached_case_expires_after_ttl(service):
+    base, _, _ = service
+    get(base + '/case?number=PB-2024-722')
+    time.sleep(1.1)
+    get(base + '/case?number=PB-2024-722')
+    assert upstream_case_fetches() == 2
+
+
+def test_urls_outside_dockets_are_rejected(service):
+    base, dockets, _ = service
+    internal = urllib.request.quote(dockets.replace('/dockets/', '/internal-admin'))
+    with pytest.raises(urllib.error.HTTPError) as error:
+        get(f"{base}/document?url={internal}")
+    assert error.value.code == 403
+    assert StandInHandler.requests == []
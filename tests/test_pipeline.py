@@ -0,0 +1,115 @@
+import threading
+
+import pandas as pd
+import pytest
+import requests
+
+from conftest import Response, StubSession
+from docfetch import DocumentFetcher
+from pipeline import ByteBoundedQueue, DocumentPipeline, load_content
+
+
+# Every case links one TIFF per entry in DOCUMENTS; documents listed in failing raise
+def stub_session(document_size=5000, documents=('a',), failing=()):
+    def answer(url):
+        name = url.rsplit('/', 1)[1]
+        if name in failing:
+            return requests.exceptions.ConnectionError('reset')
+        if url.endswith('.tif'):
+            return Response(b'\0' * document_size)
+        number = url.split('number=')[1]
+        links = "".join(f'<a class="doc-tif" href="{number}-{doc}.tif">TIFF</a>' for doc in documents)
+        return Response(f'<strong>No. {number}</strong>{links}')
+    return StubSession(answer)
+
+
+def make_pipeline(output_file, session=None, **kwargs):
+    fetcher = DocumentFetcher()
+    fetcher.session = session or stub_session()
+    fetcher.extract_text_from_tiff = lambda content: f"ocr {len(content)} bytes"
+    kwargs.setdefault('report_interval', 60)
+    return DocumentPipeline(fetcher, str(output_file), **kwargs)
+
+
+def run_with_timeout(pipeline, urls, timeout=10):
+    result = {}
+
+    def target():
+        try:
+            result['written'] = pipeline.run(urls)
+        except Exception as e:
+            result['error'] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "pipeline.run() hung"
+    return result
+
+
+def urls(count):
+    return [f"https://www.oscn.net/dockets/GetCaseInformation.aspx?number=PB-2024-{i}" for i in range(count)]
+
+
+def test_tiffs_are_spilled_once_and_written(tmp_path):
+    pipeline = make_pipeline(tmp_path / 'out.csv', spill_bytes=1000, flush_every=7)
+    assert run_with_timeout(pipeline, urls(20)) == {'written': 20}
+    df = pd.read_csv(tmp_path / 'out.csv')
+    assert len(df) == 20
+    assert set(df['Extracted Text']) == {'ocr 5000 bytes'}
+    assert pipeline.extract_queue.spilled == 20
+    assert pipeline.ocr_queue.spilled == 0
+    assert not list(tmp_path.glob('*.spill'))
+
+
+def test_write_failure_is_raised_instead_of_hanging(tmp_path):
+    pipeline = make_pipeline(tmp_path / 'missing' / 'out.csv', max_queue_items=3, flush_every=1)
+    pipeline.prepare_output = lambda: None
+    result = run_with_timeout(pipeline, urls(50))
+    assert isinstance(result.get('error'), OSError)
+
+
+def test_blank_output_gets_a_header(tmp_path):
+    output = tmp_path / 'out.csv'
+    output.write_text('\n')
+    run_with_timeout(make_pipeline(output), urls(2))
+    assert len(pd.read_csv(output)) == 2
+
+
+def test_output_with_other_columns_is_rejected(tmp_path):
+    output = tmp_path / 'out.csv'
+    output.write_text('Case Number,Extracted Text\nPB-2024-1,old\n')
+    with pytest.raises(ValueError):
+        make_pipeline(output).run(urls(1))
+
+
+def test_put_blocks_on_disk_budget(tmp_path):
+    queue = ByteBoundedQueue('test', spill_bytes=10, spill_dir=str(tmp_path), max_spill_bytes=25)
+    queue.put({'content': b'x' * 20})
+    second = threading.Thread(target=queue.put, args=({'content': b'y' * 20},), daemon=True)
+    second.start()
+    second.join(0.2)
+    assert second.is_alive()
+    assert queue.stats()['disk_bytes'] == 20
+    assert load_content(queue.get()) == b'x' * 20
+    second.join(5)
+    assert not second.is_alive()
+    assert load_content(queue.get()) == b'y' * 20
+
+
+def test_failing_document_does_not_drop_the_rest_of_the_case(tmp_path):
+    session = stub_session(documents=('a', 'b', 'c'), failing=('PB-2024-0-b.tif',))
+    assert run_with_timeout(make_pipeline(tmp_path / 'out.csv', session), urls(2)) == {'written': 5}
+    written = pd.read_csv(tmp_path / 'out.csv')['Document URL'].str.rsplit('/', n=1).str[1]
+    assert 'PB-2024-0-c.tif' in set(written)
+
+
+def test_queued_bytes_stay_within_budget(tmp_path):
+    # 200 cases of 3 x 100 KB documents is 60 MB of payload through a 1 MB budget per queue
+    session = stub_session(document_size=100_000, documents=('a', 'b', 'c'))
+    pipeline = make_pipeline(tmp_path / 'out.csv', session, max_queue_bytes=1_000_000,
+                             spill_bytes=10_000_000, flush_every=50)
+    assert run_with_timeout(pipeline, urls(200), timeout=60) == {'written': 600}
+    for stats in pipeline.stats():
+        assert stats['peak_bytes'] <= 1_000_000, stats
+    assert pipeline.extract_queue.stats()['peak_bytes'] > 0
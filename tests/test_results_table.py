@@ -0,0 +1,56 @@
+import os
+
+import pandas as pd
+
+from conftest import Response, StubSession
+from main2 import Scraper
+from results_table import load_results, save_results, typed_results_frame
+
+OSCN_PAGE_SOURCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'oscn-page-source')
+
+
+def day(case_numbers, judge, date_filed):
+    return pd.DataFrame({
+        'Case Number': case_numbers,
+        'Date Filed': [date_filed] * len(case_numbers),
+        'Judge': [judge] * len(case_numbers),
+    })
+
+
+def test_case_numbers_are_split():
+    df = typed_results_frame(day(['PB-2024-722', 'tu-cv-24-17', 'junk'], 'SMITH', '07/03/2024'))
+    assert df['Case Type'].tolist()[:2] == ['PB', 'CV']
+    assert df['Case Year'].tolist()[:2] == [2024, 2024]
+    assert df['Case Sequence'].tolist()[:2] == [722, 17]
+    assert df['Court'].tolist()[1] == 'TU'
+    assert pd.isna(df['Case Year'].iloc[2])
+    assert str(df['Date Filed'].dtype) == 'datetime64[us]'
+
+
+def test_daily_partitions_accumulate_with_stable_dtypes(tmp_path):
+    save_results(typed_results_frame(day(['PB-2024-1'], 'SMITH', '07/02/2024')), '07-02-2024', tmp_path)
+    save_results(typed_results_frame(day(['PB-2024-2', 'TU-PB-2024-3'], 'DOE', '07/03/2024')),
+                 '07-03-2024', tmp_path)
+    # Re-scraping a day replaces that day's partition only
+    save_results(typed_results_frame(day(['PB-2024-2', 'TU-PB-2024-3'], 'DOE', '07/03/2024')),
+                 '07-03-2024', tmp_path)
+    df = load_results(tmp_path)
+    assert sorted(df['Case Number']) == ['PB-2024-1', 'PB-2024-2', 'TU-PB-2024-3']
+    assert isinstance(df['Judge'].dtype, pd.CategoricalDtype)
+    assert isinstance(df['Case Type'].dtype, pd.CategoricalDtype)
+    assert str(df['Case Year'].dtype) == 'Int16'
+    assert str(df['Date Filed'].dtype).startswith('datetime64')
+
+
+def test_scraped_results_page_loads_by_case_number(tmp_path, monkeypatch):
+    # Scraper logs to scraper.log in the working directory
+    monkeypatch.chdir(tmp_path)
+    with open(OSCN_PAGE_SOURCE, 'rb') as f:
+        page = f.read()
+    scraper = Scraper()
+    scraper.session = StubSession(lambda url: Response(page))
+    scraper.scrape_table('07-03-2024', str(tmp_path / 'parquet'))
+    df = load_results(tmp_path / 'parquet')
+    assert 'PB-2024-907' in set(df['Case Number'])
+    assert set(df['Date Filed'].dt.strftime('%m/%d/%Y')) == {'07/03/2024'}
+    assert df.loc[df['Case Number'] == 'PB-2024-907', 'Case Type'].tolist() == ['PB']
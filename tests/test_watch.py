@@ -0,0 +1,94 @@
+import pandas as pd
+import requests
+
+from conftest import Response, StubSession, make_pdf
+from watch import FilingWatcher
+
+RESULTS_PAGE = """<html><table class="caseCourtTable">
+<tr><th>Case&nbsp;Number</th><th>Date&nbsp;Filed</th></tr>
+{rows}
+</table></html>"""
+ROW = """<tr><td><a href="GetCaseInformation.aspx?db=oklahoma&number={number}">{number}</a></td>
+<td>07/03/2024</td></tr>"""
+
+
+class ResultsSession(StubSession):
+    def __init__(self, numbers):
+        super().__init__(self.answer_for)
+        self.numbers = numbers
+        self.case_responses = {}
+
+    def answer_for(self, url):
+        if 'Results.aspx' in url:
+            date_str = url.split('FiledDateL=')[1]
+            rows = "".join(ROW.format(number=number) for number in self.numbers.get(date_str, []))
+            return Response(RESULTS_PAGE.format(rows=rows))
+        if url.endswith('.pdf'):
+            return Response(make_pdf("ESTATE OF JANE DOE, DECEASED"))
+        number = url.split('number=')[1]
+        return self.case_responses.get(number, Response(f"<strong>No. {number}</strong>"))
+
+
+def make_watcher(numbers, **kwargs):
+    emitted = []
+    kwargs.setdefault('callback', lambda row, records: emitted.append(row['Case Number']))
+    watcher = FilingWatcher(**kwargs)
+    watcher.fetcher.session = watcher.session = ResultsSession({'07-03-2024': numbers})
+    return watcher, emitted
+
+
+def test_rows_use_normalized_headers():
+    watcher, _ = make_watcher(['PB-2024-1'])
+    rows = watcher.parse_rows(watcher.session.get('Results.aspx?FiledDateL=07-03-2024').text)
+    assert set(rows[0]) == {'Case Number', 'Date Filed', 'Case URL'}
+
+
+def test_only_new_cases_are_emitted():
+    watcher, emitted = make_watcher(['PB-2024-1', 'PB-2024-2'])
+    watcher.poll('07-03-2024')
+    watcher.session.numbers['07-03-2024'].append('PB-2024-3')
+    watcher.poll('07-03-2024')
+    assert emitted == ['PB-2024-1', 'PB-2024-2', 'PB-2024-3']
+
+
+def test_failed_cases_do_not_stop_the_poll_and_are_retried():
+    watcher, emitted = make_watcher(['PB-2024-1', 'PB-2024-2', 'PB-2024-3'])
+    watcher.session.case_responses['PB-2024-1'] = requests.exceptions.ConnectionError('reset')
+    watcher.session.case_responses['PB-2024-2'] = Response(status_code=500)
+    watcher.poll('07-03-2024')
+    assert emitted == ['PB-2024-3']
+    assert set(watcher.failed) == {'PB-2024-1', 'PB-2024-2'}
+
+    watcher.session.case_responses.clear()
+    watcher.poll('07-03-2024')
+    assert sorted(emitted) == ['PB-2024-1', 'PB-2024-2', 'PB-2024-3']
+    assert watcher.failed == {}
+
+
+def test_rollover_finishes_the_old_date_and_keeps_retrying_failures():
+    watcher, emitted = make_watcher(['PB-2024-1', 'PB-2024-2'])
+    watcher.session.case_responses['PB-2024-2'] = Response(status_code=500)
+    watcher.poll('07-03-2024')
+    # Posted to the old date after its last poll
+    watcher.session.numbers['07-03-2024'].append('PB-2024-3')
+    watcher.session.numbers['07-04-2024'] = ['PB-2024-4']
+    watcher.session.case_responses.clear()
+    watcher.poll('07-04-2024')
+    assert sorted(emitted) == ['PB-2024-1', 'PB-2024-2', 'PB-2024-3', 'PB-2024-4']
+    assert watcher.failed == {}
+
+
+def test_polls_append_to_the_output_csv(tmp_path):
+    output = tmp_path / 'out.csv'
+    output.write_text('\n')
+    watcher, _ = make_watcher(['PB-2024-1'], callback=None, output_file=str(output))
+    watcher.session.case_responses['PB-2024-1'] = Response(
+        '<strong>No. PB-2024-1</strong><a class="doc-pdf" href="PB-2024-1.pdf">PDF</a>')
+    watcher.poll('07-03-2024')
+    watcher.session.numbers['07-03-2024'].append('PB-2024-2')
+    watcher.session.case_responses['PB-2024-2'] = Response(
+        '<strong>No. PB-2024-2</strong><a class="doc-pdf" href="PB-2024-2.pdf">PDF</a>')
+    watcher.poll('07-03-2024')
+    df = pd.read_csv(output)
+    assert df['Case Number'].tolist() == ['PB-2024-1', 'PB-2024-2']
+    assert df['Decedent'].tolist() == ['Jane Doe', 'Jane Doe']
@@ -0,0 +1,155 @@
+import time
+from datetime import datetime
+from urllib.parse import urlparse, parse_qs
+
+import pandas as pd
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+
+from docfetch import DocumentFetcher
+from entities import ENTITY_COLUMNS
+from pipeline import RECORD_COLUMNS, prepare_csv
+
+
+class FilingWatcher:
+    def __init__(self, fetcher=None, callback=None, interval=300, output_file='outputs.csv'):
+        self.fetcher = fetcher or DocumentFetcher()
+        # Share the fetcher's session so polls and case fetches reuse one connection pool
+        self.session = self.fetcher.session
+        self.headers = self.fetcher.headers
+        self.base_url = 'https://www.oscn.net/dockets/Results.aspx?db=oklahoma&dcct=7&FiledDateL='
+        self.case_base_url = self.fetcher.base_url
+        self.callback = callback
+        self.interval = interval
+        self.output_file = output_file
+        self.write_header = None
+        self.date_str = None
+        self.seen = set()
+        self.failed = {}
+        self.etag = None
+        self.last_modified = None
+
+    # Cases that are still failing carry over to the new date so they keep being retried
+    def reset(self, date_str):
+        print(f"Watching filings for date: {date_str}")
+        self.date_str = date_str
+        self.seen = set()
+        self.etag = None
+        self.last_modified = None
+
+    def poll(self, date_str=None):
+        date_str = date_str or datetime.now().strftime('%m-%d-%Y')
+        new_rows = []
+        if date_str != self.date_str:
+            if self.date_str is not None:
+                # One last look at the old date picks up cases posted after its previous poll
+                new_rows = self.poll_date(self.date_str)
+            self.reset(date_str)
+        return new_rows + self.poll_date(date_str)
+
+    def poll_date(self, date_str):
+        headers = dict(self.headers)
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        rows = []
+        try:
+            response = self.session.get(self.base_url + date_str, headers=headers)
+            if response.status_code == 304:
+                print("Results page not modified.")
+            else:
+                response.raise_for_status()
+                if self.fetcher.archive:
+                    self.fetcher.archive.store(self.base_url + date_str, response, kind='results',
+                                              filed_date=date_str)
+                self.etag = response.headers.get('ETag')
+                self.last_modified = response.headers.get('Last-Modified')
+                rows = self.parse_rows(response.text)
+        except requests.exceptions.HTTPError as http_err:
+            print(f'HTTP error occurred while polling: {http_err}')
+        except Exception as err:
+            print(f'An error occurred while polling: {err}')
+
+        # Cases that failed on an earlier poll are retried even when the page is unchanged
+        pending = dict(self.failed)
+        for row in rows:
+            if row['Case Number'] not in self.seen:
+                pending[row['Case Number']] = row
+        print(f"Processing {len(pending)} new or retried case(s).")
+        new_rows = []
+        for case_number, row in pending.items():
+            if self.process_case(row):
+                self.seen.add(case_number)
+                self.failed.pop(case_number, None)
+                new_rows.append(row)
+            else:
+                self.failed[case_number] = row
+        if new_rows and self.callback is None:
+            self.append_to_csv(self.fetcher.data)
+            self.fetcher.data = []
+        return new_rows
+
+    # Appends only this poll's records instead of rereading and rewriting the whole CSV
+    def append_to_csv(self, records):
+        if self.write_header is None:
+            self.write_header = prepare_csv(self.output_file, RECORD_COLUMNS + ENTITY_COLUMNS)
+        df = pd.DataFrame(records, columns=RECORD_COLUMNS + ENTITY_COLUMNS)
+        df.to_csv(self.output_file, mode='a', header=self.write_header, index=False)
+        self.write_header = False
+        print(f"Appended {len(records)} record(s) to {self.output_file}")
+
+    def parse_rows(self, html_content):
+        # Only build a tree for the results table, not the whole page
+        soup = BeautifulSoup(html_content, 'html.parser',
+                             parse_only=SoupStrainer('table', class_='caseCourtTable'))
+        table = soup.find('table', class_='caseCourtTable')
+        if not table:
+            return []
+        rows = table.find_all('tr')
+        # OSCN pads headers with &nbsp; ("Case\xa0Number")
+        headers = [th.text.replace('\xa0', ' ').strip() for th in rows[0].find_all('th')]
+        parsed = []
+        for row in rows[1:]:
+            cells = row.find_all('td')
+            link = row.find('a', href=True)
+            if not cells or not link:
+                continue
+            record = dict(zip(headers, (td.text.strip() for td in cells)))
+            number = parse_qs(urlparse(link['href']).query).get('number')
+            record['Case Number'] = number[0] if number else cells[0].text.strip()
+            record['Case URL'] = self.case_base_url + link['href']
+            parsed.append(record)
+        return parsed
+
+    def process_case(self, row):
+        first_record = len(self.fetcher.data)
+        try:
+            fetched = self.fetcher.fetch_document(row['Case URL'])
+        except Exception as e:
+            print(f"Error fetching case {row['Case Number']}: {e}")
+            fetched = False
+        if not fetched:
+            del self.fetcher.data[first_record:]
+            return False
+        if self.callback:
+            records = self.fetcher.data[first_record:]
+            del self.fetcher.data[first_record:]
+            self.callback(row, records)
+        return True
+
+    def watch(self, max_polls=None):
+        polls = 0
+        while max_polls is None or polls < max_polls:
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Poll failed: {e}")
+            polls += 1
+            if max_polls is None or polls < max_polls:
+                time.sleep(self.interval)
+
+
+if __name__ == "__main__":
+    watcher = FilingWatcher(interval=300)
+    watcher.watch()